@@ -3,6 +3,20 @@ import numpy as np
 import pandas as pd
 import altair as alt
 
+from kernels.numpy_curves import threshold_grid, compute_curves as compute_curves_numpy
+
+# The compiled curve kernels are optional; without them the curve sweep runs
+# on plain NumPy. The Cython extension is built with kernels/setup.py.
+try:
+    from kernels.cython_curves import compute_curves as compute_curves_cython
+except ImportError:
+    compute_curves_cython = None
+
+try:
+    from kernels.numba_curves import compute_curves as compute_curves_numba
+except ImportError:
+    compute_curves_numba = None
+
 # Set page configuration
 st.set_page_config(
     page_title="Sepsis Alert Threshold Optimization",
@@ -40,214 +54,269 @@ with advanced_settings:
     alert_exp = st.slider("Alert rate curve exponent", 0.1, 2.0, 1.2, 0.1)
 
 # Model performance data (in a real app, this would come from your actual model)
-# These functions simulate model performance curves
+# Sensitivity, specificity and alert rate are simulated as power curves of the threshold:
+#   sensitivity = 1 - t**sen_exp
+#   specificity = 0.4 + 0.6 * t**spec_exp
+#   alert rate  = 0.8 - 0.7 * t**alert_exp  (true and false positives)
+# each clipped to [0, 1].
+
+# Evaluate the simulated curves over a grid of n thresholds
+def curves(n, sen_exp, spec_exp, alert_exp):
+    # Round to the slider step so every backend sees the same exponents and the
+    # NumPy power tables are keyed consistently
+    sen_exp, spec_exp, alert_exp = round(sen_exp, 1), round(spec_exp, 1), round(alert_exp, 1)
+    thresholds = threshold_grid(n)
+    if compute_curves_cython is not None:
+        s, sp, ar = np.empty_like(thresholds), np.empty_like(thresholds), np.empty_like(thresholds)
+        compute_curves_cython(thresholds, sen_exp, spec_exp, alert_exp, s, sp, ar)
+        return s, sp, ar
+    if compute_curves_numba is not None:
+        return compute_curves_numba(thresholds, float(sen_exp), float(spec_exp), float(alert_exp))
+    return compute_curves_numpy(n, sen_exp, spec_exp, alert_exp)
+
+# The curves only depend on the exponents, so cache them separately from the
+# clinical setting parameters
 @st.cache_data
-def get_sensitivity(threshold, exponent=0.7):
-    return max(0, min(1, 1 - threshold**exponent))
-
-@st.cache_data
-def get_specificity(threshold, exponent=0.6):
-    return min(1, max(0, 0.4 + 0.6 * threshold**exponent))
+def curve_frame(sen_exp, spec_exp, alert_exp, n=99):
+    s, sp, ar = curves(n, sen_exp, spec_exp, alert_exp)
+    return pd.DataFrame({
+        'Threshold': threshold_grid(n),
+        'Sensitivity': s,
+        'Specificity': sp,
+        'Alert Rate': ar
+    })
+
+# Chart data is sent to the browser as JSON; 4 decimals is far more than a
+# 99-point line chart can show and keeps the payload short
+CHART_DECIMALS = 4
+
+# The curve layers of the charts only change with the inputs they are keyed on,
+# so they are built once and reused. chart_data itself is not hashed (leading
+# underscore); the remaining arguments identify its contents. The caches are
+# shared by all sessions, so they are bounded to the most recent combinations.
+CHART_CACHE_ENTRIES = 32
+
+@st.cache_resource(max_entries=CHART_CACHE_ENTRIES)
+def build_metrics_chart(_chart_data, sen_exp, spec_exp, alert_exp, sepsis_prevalence, selected_metrics):
+    # Reshape to long format here rather than with a Vega-Lite fold in the browser
+    long_data = _chart_data[['Threshold', *selected_metrics]].round(CHART_DECIMALS).melt(
+        id_vars='Threshold',
+        value_vars=list(selected_metrics),
+        var_name='Metric',
+        value_name='Value'
+    )
+    return alt.Chart(long_data).mark_line().encode(
+        x=alt.X('Threshold:Q', title='Threshold'),
+        y=alt.Y('Value:Q', title='Value', scale=alt.Scale(domain=[0, 1])),
+        color=alt.Color('Metric:N', legend=alt.Legend(title="Metrics")),
+        tooltip=['Threshold', 'Value', 'Metric']
+    ).properties(
+        height=300
+    ).interactive()
 
-@st.cache_data
-def get_alert_rate(threshold, exponent=1.2):
-    # Expected alert rate considering both true and false positives
-    return max(0, min(1, 0.8 - 0.7 * threshold**exponent))
-
-# Main threshold control
-st.header("Alert Threshold Configuration")
-threshold = st.slider(
-    "Set sepsis alert threshold", 
-    min_value=0.0, 
-    max_value=1.0, 
-    value=0.5, 
-    step=0.01,
-    help="Higher thresholds result in fewer alerts but may miss some cases"
-)
+@st.cache_resource(max_entries=CHART_CACHE_ENTRIES)
+def build_workload_chart(_chart_data, sen_exp, spec_exp, alert_exp, patients_per_day, minutes_per_alert):
+    workload_data = _chart_data[['Threshold', 'Hours Needed']].round(CHART_DECIMALS)
+    workload_area = alt.Chart(workload_data).mark_area(
+        color='red',
+        opacity=0.3
+    ).encode(
+        x=alt.X('Threshold:Q', title='Threshold'),
+        y=alt.Y('Hours Needed:Q', title='Staff Hours Required')
+    ).properties(
+        height=300
+    )
 
-# Calculate metrics for current threshold
-sensitivity = get_sensitivity(threshold, sen_exp)
-specificity = get_specificity(threshold, spec_exp)
-alert_rate = get_alert_rate(threshold, alert_exp)
+    # Add a line for the workload
+    workload_line = alt.Chart(workload_data).mark_line(
+        color='red'
+    ).encode(
+        x='Threshold:Q',
+        y='Hours Needed:Q'
+    )
 
-# Calculate derived metrics
-ppv = (sensitivity * sepsis_prevalence) / (sensitivity * sepsis_prevalence + (1 - specificity) * (1 - sepsis_prevalence))
-npv = (specificity * (1 - sepsis_prevalence)) / ((1 - sensitivity) * sepsis_prevalence + specificity * (1 - sepsis_prevalence))
+    return workload_area + workload_line
 
 # Calculate workload impact
 patients_per_day = beds / avg_stay
-alerts_per_day = alert_rate * patients_per_day
-hours_needed = alerts_per_day * minutes_per_alert / 60
-
-# Display metrics in columns with formatted numbers
-col1, col2, col3, col4 = st.columns(4)
-col1.metric("Sensitivity", f"{sensitivity:.2f}", help="Proportion of sepsis cases detected")
-col2.metric("Specificity", f"{specificity:.2f}", help="Proportion of non-sepsis cases correctly classified")
-col3.metric("Alerts per Day", f"{alerts_per_day:.1f}", help="Expected number of alerts requiring response")
-col4.metric("Staff Hours Needed", f"{hours_needed:.1f}", help="Clinical time required to respond to alerts")
-
-# Additional metrics
-col1, col2 = st.columns(2)
-with col1:
-    st.metric("Positive Predictive Value", f"{ppv:.2f}", help="Probability that a positive alert is a true sepsis case")
-with col2:
-    st.metric("Negative Predictive Value", f"{npv:.2f}", help="Probability that a negative result is truly non-sepsis")
-
-# Staffing status
-st.subheader("Staffing Analysis")
-staffing_ratio = hours_needed / staff_hours
-if hours_needed > staff_hours:
-    st.error(f"⚠️ Alert burden exceeds available staff hours by {hours_needed - staff_hours:.1f} hours (Utilization: {staffing_ratio:.1%})")
-elif staffing_ratio > 0.8:
-    st.warning(f"⚠️ Alert burden using {staffing_ratio:.1%} of available staff hours ({hours_needed:.1f} of {staff_hours} hours)")
-else:
-    st.success(f"✅ Current threshold is feasible with {staff_hours - hours_needed:.1f} staff hours to spare (Utilization: {staffing_ratio:.1%})")
+# Staff hours per day needed for each unit of alert rate
+hours_per_alert_rate = patients_per_day * minutes_per_alert / 60
 
 # Generate data for charts
-thresholds = np.linspace(0.01, 0.99, 99)
-sensitivities = [get_sensitivity(t, sen_exp) for t in thresholds]
-specificities = [get_specificity(t, spec_exp) for t in thresholds]
-alert_rates = [get_alert_rate(t, alert_exp) for t in thresholds]
-hours_needed_range = [get_alert_rate(t, alert_exp) * patients_per_day * minutes_per_alert / 60 for t in thresholds]
-
-# Calculate PPV and NPV across thresholds
-ppvs = [(get_sensitivity(t, sen_exp) * sepsis_prevalence) / 
-        (get_sensitivity(t, sen_exp) * sepsis_prevalence + (1 - get_specificity(t, spec_exp)) * (1 - sepsis_prevalence))
-        for t in thresholds]
-
-# Prepare chart data
-chart_data = pd.DataFrame({
-    'Threshold': thresholds,
-    'Sensitivity': sensitivities,
-    'Specificity': specificities,
-    'Alert Rate': alert_rates,
-    'PPV': ppvs,
-    'Hours Needed': hours_needed_range
-})
-
-# Display interactive charts
-st.header("Performance Metrics vs. Threshold")
-
-# Select metrics to display
-selected_metrics = st.multiselect(
-    "Select metrics to display",
-    options=['Sensitivity', 'Specificity', 'Alert Rate', 'PPV'],
-    default=['Sensitivity', 'Specificity', 'Alert Rate']
-)
+chart_data = curve_frame(sen_exp, spec_exp, alert_exp)
+
+# Calculate workload across thresholds
+chart_data['Hours Needed'] = chart_data['Alert Rate'] * hours_per_alert_rate
+
+# Everything that depends on the threshold slider runs as a fragment, so moving
+# the slider only reruns this panel and reuses the chart data and cached layers
+@st.fragment
+def threshold_panel(chart_data, sen_exp, spec_exp, alert_exp, sepsis_prevalence, patients_per_day, minutes_per_alert, staff_hours):
+    # Main threshold control
+    st.header("Alert Threshold Configuration")
+    threshold = st.slider(
+        "Set sepsis alert threshold", 
+        min_value=0.0, 
+        max_value=1.0, 
+        value=0.5, 
+        step=0.01,
+        help="Higher thresholds result in fewer alerts but may miss some cases"
+    )
 
-if selected_metrics:
-    # Line chart for selected metrics
-    metrics_chart = alt.Chart(chart_data).transform_fold(
-        selected_metrics,
-        as_=['Metric', 'Value']
-    ).mark_line().encode(
-        x=alt.X('Threshold:Q', title='Threshold'),
-        y=alt.Y('Value:Q', title='Value', scale=alt.Scale(domain=[0, 1])),
-        color=alt.Color('Metric:N', legend=alt.Legend(title="Metrics")),
-        tooltip=['Threshold', 'Value', 'Metric']
-    ).properties(
-        height=300
-    ).interactive()
+    # Calculate metrics for current threshold
+    sensitivity = max(0.0, min(1.0, 1 - threshold**sen_exp))
+    specificity = max(0.0, min(1.0, 0.4 + 0.6 * threshold**spec_exp))
+    alert_rate = max(0.0, min(1.0, 0.8 - 0.7 * threshold**alert_exp))
+
+    # Calculate derived metrics
+    ppv_denominator = sensitivity * sepsis_prevalence + (1 - specificity) * (1 - sepsis_prevalence)
+    ppv = (sensitivity * sepsis_prevalence) / ppv_denominator if ppv_denominator > 0 else 0.0
+    npv = (specificity * (1 - sepsis_prevalence)) / ((1 - sensitivity) * sepsis_prevalence + specificity * (1 - sepsis_prevalence))
+
+    # Calculate workload impact
+    alerts_per_day = alert_rate * patients_per_day
+    hours_needed = alerts_per_day * minutes_per_alert / 60
+
+    # Display metrics in columns with formatted numbers
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Sensitivity", f"{sensitivity:.2f}", help="Proportion of sepsis cases detected")
+    col2.metric("Specificity", f"{specificity:.2f}", help="Proportion of non-sepsis cases correctly classified")
+    col3.metric("Alerts per Day", f"{alerts_per_day:.1f}", help="Expected number of alerts requiring response")
+    col4.metric("Staff Hours Needed", f"{hours_needed:.1f}", help="Clinical time required to respond to alerts")
+
+    # Additional metrics
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Positive Predictive Value", f"{ppv:.2f}", help="Probability that a positive alert is a true sepsis case")
+    with col2:
+        st.metric("Negative Predictive Value", f"{npv:.2f}", help="Probability that a negative result is truly non-sepsis")
+
+    # Staffing status
+    st.subheader("Staffing Analysis")
+    staffing_ratio = hours_needed / staff_hours
+    if hours_needed > staff_hours:
+        st.error(f"⚠️ Alert burden exceeds available staff hours by {hours_needed - staff_hours:.1f} hours (Utilization: {staffing_ratio:.1%})")
+    elif staffing_ratio > 0.8:
+        st.warning(f"⚠️ Alert burden using {staffing_ratio:.1%} of available staff hours ({hours_needed:.1f} of {staff_hours} hours)")
+    else:
+        st.success(f"✅ Current threshold is feasible with {staff_hours - hours_needed:.1f} staff hours to spare (Utilization: {staffing_ratio:.1%})")
+
+    # Display interactive charts
+    st.header("Performance Metrics vs. Threshold")
+
+    # Select metrics to display
+    selected_metrics = st.multiselect(
+        "Select metrics to display",
+        options=['Sensitivity', 'Specificity', 'Alert Rate', 'PPV'],
+        default=['Sensitivity', 'Specificity', 'Alert Rate']
+    )
+
+    # PPV across thresholds is only needed when it is displayed
+    if 'PPV' in selected_metrics:
+        # PPV is 0/0 where sensitivity is 0 and specificity is 1; report 0 there
+        true_pos = chart_data['Sensitivity'].values * sepsis_prevalence
+        all_pos = true_pos + (1 - chart_data['Specificity'].values) * (1 - sepsis_prevalence)
+        chart_data['PPV'] = np.divide(true_pos, all_pos, out=np.zeros_like(true_pos), where=all_pos > 0)
+
+    if selected_metrics:
+        # Line chart for selected metrics
+        metrics_chart = build_metrics_chart(chart_data, sen_exp, spec_exp, alert_exp, sepsis_prevalence, tuple(selected_metrics))
+
+        # Add a vertical line for current threshold
+        threshold_line = alt.Chart(pd.DataFrame({'threshold': [threshold]})).mark_rule(color='red').encode(
+            x='threshold:Q'
+        )
+
+        st.altair_chart(metrics_chart + threshold_line, use_container_width=True)
+    else:
+        st.info("Please select at least one metric to display")
+
+    # Workload chart
+    st.header("Clinical Workload Impact")
+    workload_chart = build_workload_chart(chart_data, sen_exp, spec_exp, alert_exp, patients_per_day, minutes_per_alert)
+
+    # Add a horizontal line for available staff
+    staff_line = alt.Chart(pd.DataFrame({'staff_hours': [staff_hours]})).mark_rule(
+        color='green'
+    ).encode(
+        y='staff_hours:Q'
+    )
+
+    # Add annotation for staff hours
+    staff_text = alt.Chart(pd.DataFrame({'staff_hours': [staff_hours], 'x': [0.8]})).mark_text(
+        align='left',
+        baseline='bottom',
+        dx=5,
+        color='green'
+    ).encode(
+        x='x:Q',
+        y='staff_hours:Q',
+        text=alt.value(f'Available Staff Hours: {staff_hours}')
+    )
 
     # Add a vertical line for current threshold
     threshold_line = alt.Chart(pd.DataFrame({'threshold': [threshold]})).mark_rule(color='red').encode(
         x='threshold:Q'
     )
 
-    st.altair_chart(metrics_chart + threshold_line, use_container_width=True)
-else:
-    st.info("Please select at least one metric to display")
-
-# Workload chart
-st.header("Clinical Workload Impact")
-workload_chart = alt.Chart(chart_data).mark_area(
-    color='red',
-    opacity=0.3
-).encode(
-    x=alt.X('Threshold:Q', title='Threshold'),
-    y=alt.Y('Hours Needed:Q', title='Staff Hours Required')
-).properties(
-    height=300
-)
-
-# Add a line for the workload
-workload_line = alt.Chart(chart_data).mark_line(
-    color='red'
-).encode(
-    x='Threshold:Q',
-    y='Hours Needed:Q'
-)
-
-# Add a horizontal line for available staff
-staff_line = alt.Chart(pd.DataFrame({'staff_hours': [staff_hours]})).mark_rule(
-    color='green'
-).encode(
-    y='staff_hours:Q'
-)
-
-# Add annotation for staff hours
-staff_text = alt.Chart(pd.DataFrame({'staff_hours': [staff_hours], 'x': [0.8]})).mark_text(
-    align='left',
-    baseline='bottom',
-    dx=5,
-    color='green'
-).encode(
-    x='x:Q',
-    y='staff_hours:Q',
-    text=alt.value(f'Available Staff Hours: {staff_hours}')
-)
-
-# Add a vertical line for current threshold
-threshold_line = alt.Chart(pd.DataFrame({'threshold': [threshold]})).mark_rule(color='red').encode(
-    x='threshold:Q'
-)
+    st.altair_chart(workload_chart + staff_line + staff_text + threshold_line, use_container_width=True)
 
-st.altair_chart(workload_chart + workload_line + staff_line + staff_text + threshold_line, use_container_width=True)
+threshold_panel(chart_data, sen_exp, spec_exp, alert_exp, sepsis_prevalence, patients_per_day, minutes_per_alert, staff_hours)
 
 # Find optimal thresholds
 st.header("Threshold Recommendations")
 
-# Maximum sensitivity within staff constraints
-valid_thresholds = chart_data[chart_data['Hours Needed'] <= staff_hours]
-if not valid_thresholds.empty:
+# Extract the curves once as raw arrays for the threshold search
+thr = chart_data['Threshold'].values
+sens = chart_data['Sensitivity'].values
+spec = chart_data['Specificity'].values
+hrs = chart_data['Hours Needed'].values
+
+# The three recommendations are separate reductions sharing the same
+# precomputed masks and arrays
+min_sensitivity = 0.7
+feasible = hrs <= staff_hours
+efficient = feasible & (sens >= min_sensitivity)
+j_score = sens + spec - 1  # Youden's J
+recommended = {
+    'sensitivity': np.argmax(np.where(feasible, sens, -np.inf)),
+    'balanced': np.argmax(np.where(feasible, j_score, -np.inf)),
+    'efficient': np.argmin(np.where(efficient, hrs, np.inf)),
+}
+
+# Only thresholds within staff constraints are recommended
+if feasible.any():
     # Create three columns for different optimization goals
     col1, col2, col3 = st.columns(3)
     
     # 1. Optimize for sensitivity
     with col1:
         st.subheader("Maximize Sensitivity")
-        optimal_idx = valid_thresholds['Sensitivity'].idxmax()
-        optimal_threshold = valid_thresholds.iloc[optimal_idx]['Threshold']
-        st.success(f"Threshold: {optimal_threshold:.2f}")
-        st.write(f"Sensitivity: {valid_thresholds.iloc[optimal_idx]['Sensitivity']:.2f}")
-        st.write(f"Specificity: {valid_thresholds.iloc[optimal_idx]['Specificity']:.2f}")
-        st.write(f"Staff Hours: {valid_thresholds.iloc[optimal_idx]['Hours Needed']:.1f}")
+        optimal_idx = recommended['sensitivity']
+        st.success(f"Threshold: {thr[optimal_idx]:.2f}")
+        st.write(f"Sensitivity: {sens[optimal_idx]:.2f}")
+        st.write(f"Specificity: {spec[optimal_idx]:.2f}")
+        st.write(f"Staff Hours: {hrs[optimal_idx]:.1f}")
     
     # 2. Optimize for balanced performance (Youden's J = Sensitivity + Specificity - 1)
     with col2:
         st.subheader("Balanced Performance")
-        valid_thresholds['Youden_J'] = valid_thresholds['Sensitivity'] + valid_thresholds['Specificity'] - 1
-        balanced_idx = valid_thresholds['Youden_J'].idxmax()
-        balanced_threshold = valid_thresholds.iloc[balanced_idx]['Threshold']
-        st.success(f"Threshold: {balanced_threshold:.2f}")
-        st.write(f"Sensitivity: {valid_thresholds.iloc[balanced_idx]['Sensitivity']:.2f}")
-        st.write(f"Specificity: {valid_thresholds.iloc[balanced_idx]['Specificity']:.2f}")
-        st.write(f"Staff Hours: {valid_thresholds.iloc[balanced_idx]['Hours Needed']:.1f}")
+        balanced_idx = recommended['balanced']
+        st.success(f"Threshold: {thr[balanced_idx]:.2f}")
+        st.write(f"Sensitivity: {sens[balanced_idx]:.2f}")
+        st.write(f"Specificity: {spec[balanced_idx]:.2f}")
+        st.write(f"Staff Hours: {hrs[balanced_idx]:.1f}")
     
     # 3. Optimize for minimal staffing while maintaining reasonable sensitivity
     with col3:
         st.subheader("Resource Efficient")
-        # Find thresholds with at least 0.7 sensitivity
-        min_sensitivity = 0.7
-        efficient_thresholds = valid_thresholds[valid_thresholds['Sensitivity'] >= min_sensitivity]
-        
-        if not efficient_thresholds.empty:
-            efficient_idx = efficient_thresholds['Hours Needed'].idxmin()
-            efficient_threshold = efficient_thresholds.iloc[efficient_idx]['Threshold']
-            st.success(f"Threshold: {efficient_threshold:.2f}")
-            st.write(f"Sensitivity: {efficient_thresholds.iloc[efficient_idx]['Sensitivity']:.2f}")
-            st.write(f"Specificity: {efficient_thresholds.iloc[efficient_idx]['Specificity']:.2f}")
-            st.write(f"Staff Hours: {efficient_thresholds.iloc[efficient_idx]['Hours Needed']:.1f}")
+        # Only thresholds with at least min_sensitivity sensitivity qualify
+        if efficient.any():
+            efficient_idx = recommended['efficient']
+            st.success(f"Threshold: {thr[efficient_idx]:.2f}")
+            st.write(f"Sensitivity: {sens[efficient_idx]:.2f}")
+            st.write(f"Specificity: {spec[efficient_idx]:.2f}")
+            st.write(f"Staff Hours: {hrs[efficient_idx]:.1f}")
         else:
             st.error(f"No threshold with sensitivity ≥{min_sensitivity} is feasible")
 else:
@@ -0,0 +1,2 @@
+# Curve-sweep backends for app.py. They live outside the Streamlit script so
+# that module-level state (caches, compiled kernels) survives reruns.
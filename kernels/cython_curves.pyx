@@ -0,0 +1,18 @@
+# cython: language_level=3
+# Compiled curve sweep for app.py. Build in place from the repository root with:
+#   python kernels/setup.py build_ext --inplace
+cimport cython
+from libc.math cimport pow, fmin, fmax
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cpdef void compute_curves(const double[::1] t, double sen_exp, double spec_exp, double alert_exp,
+                          double[::1] s, double[::1] sp, double[::1] ar) noexcept nogil:
+    cdef Py_ssize_t i, n = t.shape[0]
+    cdef double ti
+    for i in range(n):
+        ti = t[i]
+        s[i] = fmax(0.0, fmin(1.0, 1 - pow(ti, sen_exp)))
+        sp[i] = fmax(0.0, fmin(1.0, 0.4 + 0.6 * pow(ti, spec_exp)))
+        ar[i] = fmax(0.0, fmin(1.0, 0.8 - 0.7 * pow(ti, alert_exp)))
@@ -0,0 +1,18 @@
+import numpy as np
+from numba import njit
+
+
+# Compiled single-loop version of the curve sweep. Defined at import time so the
+# dispatcher (and its compiled code) is reused across Streamlit reruns.
+@njit(cache=True, fastmath=True)
+def compute_curves(t, sen_exp, spec_exp, alert_exp):
+    n = t.size
+    s = np.empty(n)
+    sp = np.empty(n)
+    ar = np.empty(n)
+    for i in range(n):
+        ti = t[i]
+        s[i] = max(0.0, min(1.0, 1 - ti**sen_exp))
+        sp[i] = max(0.0, min(1.0, 0.4 + 0.6 * ti**spec_exp))
+        ar[i] = max(0.0, min(1.0, 0.8 - 0.7 * ti**alert_exp))
+    return s, sp, ar
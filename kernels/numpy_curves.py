@@ -0,0 +1,26 @@
+import functools
+
+import numpy as np
+
+
+# Threshold grid and its powers, kept for the life of the process. The exponent
+# sliders step by 0.1, so moving one slider reuses the power tables of the
+# other two.
+@functools.lru_cache(maxsize=8)
+def threshold_grid(n):
+    t = np.linspace(0.01, 0.99, n)
+    t.setflags(write=False)
+    return t
+
+@functools.lru_cache(maxsize=64)
+def threshold_powers(n, exponent):
+    powers = threshold_grid(n) ** exponent
+    powers.setflags(write=False)
+    return powers
+
+# NumPy version of the curve sweep over a grid of n thresholds
+def compute_curves(n, sen_exp, spec_exp, alert_exp):
+    s = np.clip(1 - threshold_powers(n, sen_exp), 0, 1)
+    sp = np.clip(0.4 + 0.6 * threshold_powers(n, spec_exp), 0, 1)
+    ar = np.clip(0.8 - 0.7 * threshold_powers(n, alert_exp), 0, 1)
+    return s, sp, ar
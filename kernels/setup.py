@@ -0,0 +1,14 @@
+# Builds the optional Cython curve kernel used by app.py. Run from the
+# repository root:
+#   python kernels/setup.py build_ext --inplace
+# This only builds the extension; the tutorial itself is not a package.
+import sys
+
+from setuptools import setup
+
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    sys.exit("Building the curve kernel requires Cython 3.0 or newer: pip install 'Cython>=3.0'")
+
+setup(ext_modules=cythonize("kernels/cython_curves.pyx"))
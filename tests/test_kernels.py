@@ -0,0 +1,33 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from kernels.numpy_curves import threshold_grid, compute_curves as compute_curves_numpy
+
+# Default slider values plus the extremes of each exponent slider
+EXPONENTS = [
+    (0.7, 0.6, 1.2),
+    (0.1, 0.1, 0.1),
+    (2.0, 2.0, 2.0),
+    (0.1, 2.0, 1.0),
+]
+
+
+@pytest.mark.parametrize("sen_exp, spec_exp, alert_exp", EXPONENTS)
+def test_numba_matches_numpy(sen_exp, spec_exp, alert_exp):
+    numba_curves = pytest.importorskip("kernels.numba_curves")
+    expected = compute_curves_numpy(99, sen_exp, spec_exp, alert_exp)
+    actual = numba_curves.compute_curves(threshold_grid(99), sen_exp, spec_exp, alert_exp)
+    for a, e in zip(actual, expected):
+        np.testing.assert_allclose(a, e, rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize("sen_exp, spec_exp, alert_exp", EXPONENTS)
+def test_cython_matches_numpy(sen_exp, spec_exp, alert_exp):
+    cython_curves = pytest.importorskip("kernels.cython_curves")
+    t = threshold_grid(99)
+    actual = np.empty_like(t), np.empty_like(t), np.empty_like(t)
+    cython_curves.compute_curves(t, sen_exp, spec_exp, alert_exp, *actual)
+    expected = compute_curves_numpy(99, sen_exp, spec_exp, alert_exp)
+    for a, e in zip(actual, expected):
+        np.testing.assert_allclose(a, e, rtol=1e-12, atol=1e-12)